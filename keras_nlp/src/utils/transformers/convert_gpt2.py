@@ -0,0 +1,237 @@
+# Copyright 2024 The KerasNLP Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import concurrent.futures
+
+import numpy as np
+
+from keras_nlp.src.utils.preset_utils import HF_CONFIG_FILE
+from keras_nlp.src.utils.preset_utils import get_file
+from keras_nlp.src.utils.preset_utils import jax_memory_cleanup
+from keras_nlp.src.utils.preset_utils import load_config
+from keras_nlp.src.utils.transformers.safetensor_utils import SafetensorLoader
+
+
+def _reshape_hook(hf_tensor, keras_shape):
+    return np.reshape(hf_tensor, keras_shape)
+
+
+def _query_kernel_hook(hf_tensor, keras_shape):
+    hidden_dim = keras_shape[0]
+    return np.reshape(hf_tensor[:, :hidden_dim], keras_shape)
+
+
+def _key_kernel_hook(hf_tensor, keras_shape):
+    hidden_dim = keras_shape[0]
+    return np.reshape(hf_tensor[:, hidden_dim : 2 * hidden_dim], keras_shape)
+
+
+def _value_kernel_hook(hf_tensor, keras_shape):
+    hidden_dim = keras_shape[0]
+    return np.reshape(hf_tensor[:, 2 * hidden_dim :], keras_shape)
+
+
+def _query_bias_hook(hf_tensor, keras_shape):
+    hidden_dim = keras_shape[0] * keras_shape[1]
+    return np.reshape(hf_tensor[:hidden_dim], keras_shape)
+
+
+def _key_bias_hook(hf_tensor, keras_shape):
+    hidden_dim = keras_shape[0] * keras_shape[1]
+    return np.reshape(hf_tensor[hidden_dim : 2 * hidden_dim], keras_shape)
+
+
+def _value_bias_hook(hf_tensor, keras_shape):
+    hidden_dim = keras_shape[0] * keras_shape[1]
+    return np.reshape(hf_tensor[2 * hidden_dim :], keras_shape)
+
+
+def convert_weights(backbone, loader):
+    # Embedding layers
+    loader.port_weight(
+        keras_variable=backbone.get_layer("token_embedding").variables[0],
+        hf_weight_key="wte.weight",
+    )
+    loader.port_weight(
+        keras_variable=backbone.get_layer("position_embedding").variables[0],
+        hf_weight_key="wpe.weight",
+    )
+
+    # Attention blocks. Each layer writes a disjoint set of variables and
+    # the work is dominated by file reads and numpy copies which release
+    # the GIL, so layers are ported concurrently to overlap the reads.
+    def port_layer(index):
+        decoder_layer = backbone.transformer_layers[index]
+        self_attention_layer = decoder_layer._self_attention_layer
+        self_attention_layer_norm = decoder_layer._self_attention_layer_norm
+        feedforward_layer_norm = decoder_layer._feedforward_layer_norm
+        intermediate_dense = decoder_layer._feedforward_intermediate_dense
+        output_dense = decoder_layer._feedforward_output_dense
+        prefix = f"h.{index}"
+        # Norm layers
+        loader.port_weight(
+            keras_variable=self_attention_layer_norm.variables[0],
+            hf_weight_key=f"{prefix}.ln_1.weight",
+        )
+        loader.port_weight(
+            keras_variable=self_attention_layer_norm.variables[1],
+            hf_weight_key=f"{prefix}.ln_1.bias",
+        )
+        loader.port_weight(
+            keras_variable=feedforward_layer_norm.variables[0],
+            hf_weight_key=f"{prefix}.ln_2.weight",
+        )
+        loader.port_weight(
+            keras_variable=feedforward_layer_norm.variables[1],
+            hf_weight_key=f"{prefix}.ln_2.bias",
+        )
+
+        # Attention layers. The HF `c_attn` tensors fuse the query, key and
+        # value projections along the last axis, so read each tensor once
+        # and slice it in memory rather than once per projection.
+        loader.port_weight_group(
+            hf_weight_key=f"{prefix}.attn.c_attn.weight",
+            ports=[
+                (
+                    self_attention_layer._query_dense.variables[0],
+                    _query_kernel_hook,
+                ),
+                (
+                    self_attention_layer._key_dense.variables[0],
+                    _key_kernel_hook,
+                ),
+                (
+                    self_attention_layer._value_dense.variables[0],
+                    _value_kernel_hook,
+                ),
+            ],
+        )
+        loader.port_weight_group(
+            hf_weight_key=f"{prefix}.attn.c_attn.bias",
+            ports=[
+                (
+                    self_attention_layer._query_dense.variables[1],
+                    _query_bias_hook,
+                ),
+                (
+                    self_attention_layer._key_dense.variables[1],
+                    _key_bias_hook,
+                ),
+                (
+                    self_attention_layer._value_dense.variables[1],
+                    _value_bias_hook,
+                ),
+            ],
+        )
+        loader.port_weight(
+            keras_variable=self_attention_layer._output_dense.variables[0],
+            hf_weight_key=f"{prefix}.attn.c_proj.weight",
+            hook_fn=_reshape_hook,
+        )
+        loader.port_weight(
+            keras_variable=self_attention_layer._output_dense.variables[1],
+            hf_weight_key=f"{prefix}.attn.c_proj.bias",
+        )
+
+        # MLP layers
+        loader.port_weight(
+            keras_variable=intermediate_dense.variables[0],
+            hf_weight_key=f"{prefix}.mlp.c_fc.weight",
+        )
+        loader.port_weight(
+            keras_variable=intermediate_dense.variables[1],
+            hf_weight_key=f"{prefix}.mlp.c_fc.bias",
+        )
+        loader.port_weight(
+            keras_variable=output_dense.variables[0],
+            hf_weight_key=f"{prefix}.mlp.c_proj.weight",
+        )
+        loader.port_weight(
+            keras_variable=output_dense.variables[1],
+            hf_weight_key=f"{prefix}.mlp.c_proj.bias",
+        )
+
+    num_layers = backbone.num_layers
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(32, num_layers)
+    ) as executor:
+        list(executor.map(port_layer, range(num_layers)))
+
+    # Final normalization layer
+    loader.port_weight(
+        keras_variable=backbone.get_layer("layer_norm").variables[0],
+        hf_weight_key="ln_f.weight",
+    )
+    loader.port_weight(
+        keras_variable=backbone.get_layer("layer_norm").variables[1],
+        hf_weight_key="ln_f.bias",
+    )
+
+
+def load_gpt2_backbone(cls, preset, load_weights):
+    """
+    Load and initialize the GPT-2 backbone model.
+
+    Args:
+        cls (class): Keras model class.
+        preset (str): Preset configuration name.
+        load_weights (bool): Whether to load the weights.
+
+    Returns:
+        backbone: Initialized Keras model backbone.
+    """
+    transformers_config = load_config(preset, HF_CONFIG_FILE)
+
+    backbone = cls(
+        vocabulary_size=transformers_config["vocab_size"],
+        num_layers=transformers_config["n_layer"],
+        num_heads=transformers_config["n_head"],
+        hidden_dim=transformers_config["n_embd"],
+        # `n_inner` is optional in HF configs and `None` means the default
+        # of four times the hidden size.
+        intermediate_dim=(
+            transformers_config.get("n_inner")
+            or transformers_config["n_embd"] * 4
+        ),
+        max_sequence_length=transformers_config["n_positions"],
+    )
+
+    if not load_weights:
+        return backbone
+
+    jax_memory_cleanup(backbone)
+    # Code to port the weights from safetensors into the keras nlp model
+    with SafetensorLoader(preset) as loader:
+        convert_weights(backbone, loader)
+
+    return backbone
+
+
+def load_gpt2_tokenizer(cls, preset):
+    """
+    Load the GPT-2 tokenizer.
+
+    Args:
+        cls (class): Tokenizer class.
+        preset (str): Preset configuration name.
+
+    Returns:
+        tokenizer: Initialized tokenizer.
+    """
+    vocab = load_config(preset, "vocab.json")
+    merges_path = get_file(preset, "merges.txt")
+    with open(merges_path, encoding="utf-8") as f:
+        # The first line of the HF merges file is a version header.
+        merges = f.read().splitlines()[1:]
+
+    return cls(vocabulary=vocab, merges=merges)
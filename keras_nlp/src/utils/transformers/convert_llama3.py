@@ -11,16 +11,43 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from functools import partial
+import concurrent.futures
 
 import numpy as np
 
 from keras_nlp.src.utils.preset_utils import HF_CONFIG_FILE
-from keras_nlp.src.utils.preset_utils import SAFETENSOR_CONFIG_FILE
-from keras_nlp.src.utils.preset_utils import get_file
 from keras_nlp.src.utils.preset_utils import jax_memory_cleanup
 from keras_nlp.src.utils.preset_utils import load_config
-from keras_nlp.src.utils.transformers.safetensor_utils import set_keras_weight
+from keras_nlp.src.utils.transformers.safetensor_utils import SafetensorLoader
+
+
+def _transpose_hook(hf_tensor, _):
+    # HF stores Dense kernels as [out, in] and Keras wants [in, out]. `.T`
+    # is a free view, so force the one-shot contiguous copy here instead of
+    # paying a hidden strided gather inside `assign`.
+    return np.ascontiguousarray(hf_tensor.T)
+
+
+def _qkv_dense_hook(hf_tensor, keras_shape):
+    # Materialize the permuted tensor in one contiguous pass, so `assign`
+    # gets a contiguous array instead of gathering from a strided view.
+    return np.ascontiguousarray(
+        np.moveaxis(
+            hf_tensor.reshape(keras_shape[1], keras_shape[2], keras_shape[0]),
+            -1,
+            0,
+        )
+    )
+
+
+def _output_dense_hook(hf_tensor, keras_shape):
+    return np.ascontiguousarray(
+        np.moveaxis(
+            hf_tensor.reshape(keras_shape[2], keras_shape[0], keras_shape[1]),
+            0,
+            -1,
+        )
+    )
 
 
 def load_llama3_backbone(cls, preset, load_weights):
@@ -51,134 +78,111 @@ def load_llama3_backbone(cls, preset, load_weights):
 
     jax_memory_cleanup(backbone)
     # Code to port the weights from safetensors into the keras nlp model
-    safetensor_config = load_config(preset, SAFETENSOR_CONFIG_FILE)
-    safetensor_files = {
-        fname: get_file(preset, fname)
-        for fname in set(safetensor_config["weight_map"].values())
-    }
-    port_weight = partial(
-        set_keras_weight,
-        safetensor_files=safetensor_files,
-        safetensor_config=safetensor_config,
-    )
-
-    # Embedding layers
-    port_weight(
-        keras_variable=backbone.get_layer("token_embedding").variables[0],
-        hf_weight_key="model.embed_tokens.weight",
-    )
-    port_weight(
-        keras_variable=backbone.get_layer("token_embedding").variables[1],
-        hf_weight_key="lm_head.weight",
-        # rearrange_pattern="b a -> a b",
-        hook_fn=lambda hf_tensor, _: np.transpose(hf_tensor, axes=(1, 0)),
-    )
-
-    # Attention blocks
-    for i in range(backbone.num_layers):
-        decoder_layer = backbone.get_layer(f"transformer_layer_{i}")
-        # Norm layers
-        port_weight(
-            keras_variable=decoder_layer._self_attention_layernorm.variables[0],
-            hf_weight_key=f"model.layers.{i}.input_layernorm.weight",
+    with SafetensorLoader(preset) as loader:
+        # Embedding layers
+        loader.port_weight(
+            keras_variable=backbone.get_layer("token_embedding").variables[0],
+            hf_weight_key="model.embed_tokens.weight",
         )
-        port_weight(
-            keras_variable=decoder_layer._feedforward_layernorm.variables[0],
-            hf_weight_key=f"model.layers.{i}.post_attention_layernorm.weight",
+        loader.port_weight(
+            keras_variable=backbone.get_layer("token_embedding").variables[1],
+            hf_weight_key="lm_head.weight",
+            # rearrange_pattern="b a -> a b",
+            hook_fn=_transpose_hook,
         )
 
-        # Attention layers
-        port_weight(
-            keras_variable=decoder_layer._self_attention_layer._query_dense.variables[
-                0
-            ],
-            hf_weight_key=f"model.layers.{i}.self_attn.q_proj.weight",
-            # rearrange_patterns="(b c) a -> a b c,
-            # rearrange_dims={"b": backbone.num_query_heads},
-            hook_fn=lambda hf_tensor, keras_shape: np.transpose(
-                np.reshape(
-                    hf_tensor,
-                    (keras_shape[1], keras_shape[2], keras_shape[0]),
+        # Attention blocks. Each layer writes a disjoint set of variables
+        # and the work is dominated by file reads and numpy copies which
+        # release the GIL, so layers are ported concurrently to overlap the
+        # reads.
+        def port_layer(i):
+            decoder_layer = backbone.get_layer(f"transformer_layer_{i}")
+            self_attention_layer = decoder_layer._self_attention_layer
+            prefix = f"model.layers.{i}"
+            # Norm layers
+            loader.port_weight(
+                keras_variable=(
+                    decoder_layer._self_attention_layernorm.variables[0]
                 ),
-                axes=(2, 0, 1),
-            ),
-        )
-        port_weight(
-            keras_variable=decoder_layer._self_attention_layer._key_dense.variables[
-                0
-            ],
-            hf_weight_key=f"model.layers.{i}.self_attn.k_proj.weight",
-            # rearrange_patterns="(b c) a -> a b c",
-            # rearrange_dims={"b": backbone.num_key_value_heads},
-            hook_fn=lambda hf_tensor, keras_shape: np.transpose(
-                np.reshape(
-                    hf_tensor,
-                    (keras_shape[1], keras_shape[2], keras_shape[0]),
+                hf_weight_key=f"{prefix}.input_layernorm.weight",
+            )
+            loader.port_weight(
+                keras_variable=(
+                    decoder_layer._feedforward_layernorm.variables[0]
                 ),
-                axes=(2, 0, 1),
-            ),
-        )
-        port_weight(
-            keras_variable=decoder_layer._self_attention_layer._value_dense.variables[
-                0
-            ],
-            hf_weight_key=f"model.layers.{i}.self_attn.v_proj.weight",
-            # rearrange_patterns="(b c) a -> a b c",
-            # rearrange_dims={"b": backbone.num_key_value_heads},
-            hook_fn=lambda hf_tensor, keras_shape: np.transpose(
-                np.reshape(
-                    hf_tensor,
-                    (keras_shape[1], keras_shape[2], keras_shape[0]),
+                hf_weight_key=f"{prefix}.post_attention_layernorm.weight",
+            )
+
+            # Attention layers
+            loader.port_weight(
+                keras_variable=self_attention_layer._query_dense.variables[0],
+                hf_weight_key=f"{prefix}.self_attn.q_proj.weight",
+                # rearrange_patterns="(b c) a -> a b c,
+                # rearrange_dims={"b": backbone.num_query_heads},
+                hook_fn=_qkv_dense_hook,
+            )
+            loader.port_weight(
+                keras_variable=self_attention_layer._key_dense.variables[0],
+                hf_weight_key=f"{prefix}.self_attn.k_proj.weight",
+                # rearrange_patterns="(b c) a -> a b c",
+                # rearrange_dims={"b": backbone.num_key_value_heads},
+                hook_fn=_qkv_dense_hook,
+            )
+            loader.port_weight(
+                keras_variable=self_attention_layer._value_dense.variables[0],
+                hf_weight_key=f"{prefix}.self_attn.v_proj.weight",
+                # rearrange_patterns="(b c) a -> a b c",
+                # rearrange_dims={"b": backbone.num_key_value_heads},
+                hook_fn=_qkv_dense_hook,
+            )
+            loader.port_weight(
+                keras_variable=self_attention_layer._output_dense.variables[0],
+                hf_weight_key=f"{prefix}.self_attn.o_proj.weight",
+                # rearrange_patterns="c (a b) -> a b c",
+                # rearrange_dims={"a": backbone.num_query_heads},
+                hook_fn=_output_dense_hook,
+            )
+
+            # MLP layers
+            loader.port_weight(
+                keras_variable=(
+                    decoder_layer._feedforward_gate_dense.variables[0]
                 ),
-                axes=(2, 0, 1),
-            ),
-        )
-        port_weight(
-            keras_variable=decoder_layer._self_attention_layer._output_dense.variables[
-                0
-            ],
-            hf_weight_key=f"model.layers.{i}.self_attn.o_proj.weight",
-            # rearrange_patterns="c (a b) -> a b c",
-            # rearrange_dims={"a": backbone.num_query_heads},
-            hook_fn=lambda hf_tensor, keras_shape: np.transpose(
-                np.reshape(
-                    hf_tensor,
-                    (keras_shape[2], keras_shape[0], keras_shape[1]),
+                hf_weight_key=f"{prefix}.mlp.gate_proj.weight",
+                # rearrange_patterns="b a -> a b",
+                hook_fn=_transpose_hook,
+            )
+            loader.port_weight(
+                keras_variable=(
+                    decoder_layer._feedforward_intermediate_dense.variables[0]
                 ),
-                axes=(1, 2, 0),
-            ),
-        )
-
-        # MLP layers
-        port_weight(
-            keras_variable=decoder_layer._feedforward_gate_dense.variables[0],
-            hf_weight_key=f"model.layers.{i}.mlp.gate_proj.weight",
-            # rearrange_patterns="b a -> a b",
-            hook_fn=lambda hf_tensor, _: np.transpose(hf_tensor, axes=(1, 0)),
-        )
-        port_weight(
-            keras_variable=decoder_layer._feedforward_intermediate_dense.variables[
-                0
-            ],
-            hf_weight_key=f"model.layers.{i}.mlp.up_proj.weight",
-            # rearrange_patterns="b a -> a b",
-            hook_fn=lambda hf_tensor, _: np.transpose(hf_tensor, axes=(1, 0)),
-        )
-        port_weight(
-            keras_variable=decoder_layer._feedforward_output_dense.variables[0],
-            hf_weight_key=f"model.layers.{i}.mlp.down_proj.weight",
-            # rearrange_patterns="b a -> a b",
-            hook_fn=lambda hf_tensor, _: np.transpose(hf_tensor, axes=(1, 0)),
+                hf_weight_key=f"{prefix}.mlp.up_proj.weight",
+                # rearrange_patterns="b a -> a b",
+                hook_fn=_transpose_hook,
+            )
+            loader.port_weight(
+                keras_variable=(
+                    decoder_layer._feedforward_output_dense.variables[0]
+                ),
+                hf_weight_key=f"{prefix}.mlp.down_proj.weight",
+                # rearrange_patterns="b a -> a b",
+                hook_fn=_transpose_hook,
+            )
+
+        num_layers = backbone.num_layers
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(32, num_layers)
+        ) as executor:
+            list(executor.map(port_layer, range(num_layers)))
+
+        # Final normalization layer
+        loader.port_weight(
+            keras_variable=backbone.get_layer(
+                "sequence_output_layernorm"
+            ).variables[0],
+            hf_weight_key="model.norm.weight",
         )
 
-    # Final normalization layer
-    port_weight(
-        keras_variable=backbone.get_layer(
-            "sequence_output_layernorm"
-        ).variables[0],
-        hf_weight_key="model.norm.weight",
-    )
-
     return backbone
 
 
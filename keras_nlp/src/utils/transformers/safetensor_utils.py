@@ -11,34 +11,131 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import contextlib
+import os
+import threading
+
+from keras_nlp.src.utils.preset_utils import SAFETENSOR_CONFIG_FILE
+from keras_nlp.src.utils.preset_utils import SAFETENSOR_FILE
+from keras_nlp.src.utils.preset_utils import check_file_exists
+from keras_nlp.src.utils.preset_utils import get_file
+from keras_nlp.src.utils.preset_utils import load_config
+
 try:
     import safetensors
 except ImportError:
     safetensors = None
 
 
-def set_keras_weight(
-    safetensor_files,
-    safetensor_config,
-    keras_variable,
-    hf_weight_key,
-    hook_fn=None,
-):
-    if safetensors is None:
-        raise ImportError(
-            "Converting from the huggingface/transformers model format"
-            "requires the safetensors package."
-            "Please install with `pip install safetensors`."
-        )
-    else:
+class SafetensorLoader(contextlib.ExitStack):
+    """Load weights from a set of huggingface safetensors files.
+
+    This class keeps one open handle per safetensors shard for the lifetime
+    of the context, so porting many weights only pays the file open and
+    header parse cost once per shard rather than once per weight.
+    """
+
+    def __init__(self, preset):
+        super().__init__()
+
+        if safetensors is None:
+            raise ImportError(
+                "Converting from the huggingface/transformers model format "
+                "requires the safetensors package. "
+                "Please install with `pip install safetensors`."
+            )
+
+        self.preset = preset
+        if check_file_exists(preset, SAFETENSOR_CONFIG_FILE):
+            self.safetensor_config = load_config(preset, SAFETENSOR_CONFIG_FILE)
+        else:
+            self.safetensor_config = None
+        self.safetensor_files = {}
+        # Guards handle creation when converters port layers from multiple
+        # threads.
+        self.lock = threading.Lock()
+
+    def _readahead(self, path):
+        """Ask the kernel to prefetch a whole shard into the page cache.
+
+        safe_open maps the file and faults pages in lazily, which can
+        degrade into many small reads on network filesystems or under page
+        cache pressure. Every tensor in a shard is read exactly once while
+        porting, so prefetching the full file sequentially is strictly
+        better where the platform supports it.
+        """
+        if not hasattr(os, "posix_fadvise"):
+            return
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+    def _get_file(self, hf_weight_key):
         from safetensors import safe_open
 
-    safetensor_file = safetensor_files[
-        safetensor_config["weight_map"][hf_weight_key]
-    ]
-    with safe_open(safetensor_file, framework="np") as f:
-        hf_tensor = f.get_tensor(hf_weight_key)
+        if self.safetensor_config is None:
+            fname = SAFETENSOR_FILE
+        else:
+            fname = self.safetensor_config["weight_map"][hf_weight_key]
 
+        with self.lock:
+            if fname not in self.safetensor_files:
+                path = get_file(self.preset, fname)
+                self._readahead(path)
+                self.safetensor_files[fname] = self.enter_context(
+                    safe_open(path, framework="np")
+                )
+
+        return self.safetensor_files[fname]
+
+    def get_tensor(self, hf_weight_key):
+        return self._get_file(hf_weight_key).get_tensor(hf_weight_key)
+
+    def get_slice(self, hf_weight_key):
+        """Return a lazy view of a tensor, indexable before materialization.
+
+        Indexing the returned object materializes only the requested slice,
+        so callers can pull pieces of a large fused tensor without ever
+        allocating the whole array.
+        """
+        return self._get_file(hf_weight_key).get_slice(hf_weight_key)
+
+    def port_weight(
+        self, keras_variable, hf_weight_key, hook_fn=None, target_dtype=None
+    ):
+        """Read a huggingface tensor and assign it to a Keras variable.
+
+        The tensor is cast to `target_dtype` (defaulting to the variable
+        dtype) before any `hook_fn` reshape/transpose runs, so loading a
+        float32 checkpoint under a reduced precision policy never
+        materializes a full precision copy of the rearranged tensor.
+        """
+        hf_tensor = self.get_tensor(hf_weight_key)
+        if target_dtype is None:
+            target_dtype = keras_variable.dtype
+        if hf_tensor.dtype != target_dtype:
+            hf_tensor = hf_tensor.astype(target_dtype)
         if hook_fn:
             hf_tensor = hook_fn(hf_tensor, list(keras_variable.shape))
         keras_variable.assign(hf_tensor)
+
+    def port_weight_group(self, hf_weight_key, ports, target_dtype=None):
+        """Assign slices of a single huggingface tensor to Keras variables.
+
+        `ports` is a list of `(keras_variable, hook_fn)` tuples. Each
+        `hook_fn` receives a lazy slice of the tensor and must index it
+        before any other numpy operation. The fused checkpoint tensor
+        (e.g. GPT-2's `c_attn` query/key/value projections) is therefore
+        neither re-read from disk once per slice nor materialized whole;
+        only the indexed pieces are ever allocated. Since the slices are
+        materialized individually, the dtype cast also runs per slice.
+        """
+        hf_slice = self.get_slice(hf_weight_key)
+        for keras_variable, hook_fn in ports:
+            hf_tensor = hook_fn(hf_slice, list(keras_variable.shape))
+            dtype = target_dtype or keras_variable.dtype
+            if hf_tensor.dtype != dtype:
+                hf_tensor = hf_tensor.astype(dtype)
+            keras_variable.assign(hf_tensor)